@@ -1,16 +1,22 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional, Iterable, Tuple, Annotated
 import re
+import json
+import asyncio
+import itertools
+import numpy as np
 from youtube_transcript_api import YouTubeTranscriptApi
 from fastembed import TextEmbedding
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client import QdrantClient, models
+from qdrant_client.models import Distance, VectorParams, Filter, FieldCondition, MatchValue
 import uuid
 from groq import Groq
 import os
 from dotenv import load_dotenv
+from cachetools import TTLCache
 
 load_dotenv() 
 
@@ -27,17 +33,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# GPU embedding backend
+class GPUTextEmbedding:
+    """FP16 sentence-transformers model on CUDA, exposing the same embed() as fastembed"""
+
+    def __init__(self, model_name: str, batch_size: int = 128):
+        # Optional dependency, only needed when USE_GPU_EMBED=1
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cuda")
+        self.model.half()
+        self.batch_size = batch_size
+
+    def embed(self, documents: List[str]):
+        return self.model.encode(
+            documents,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+
 # Initialize components
-embedding_model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5")
-qdrant_client = QdrantClient(path="./qdrant_storage")  # Local storage
+if os.environ.get("USE_GPU_EMBED") == "1":
+    embedding_model = GPUTextEmbedding("BAAI/bge-small-en-v1.5")
+else:
+    embedding_model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5", providers=["CPUExecutionProvider"])
+if os.environ.get("QDRANT_HOST"):
+    # Qdrant server over gRPC
+    qdrant_client = QdrantClient(
+        host=os.environ["QDRANT_HOST"],
+        port=int(os.environ.get("QDRANT_PORT", 6333)),
+        grpc_port=int(os.environ.get("QDRANT_GRPC_PORT", 6334)),
+        prefer_grpc=True,
+        timeout=10
+    )
+else:
+    qdrant_client = QdrantClient(path="./qdrant_storage")  # Local storage for development
+ytt_api = YouTubeTranscriptApi()
 groq_client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
 
 COLLECTION_NAME = "video_transcripts"
 VECTOR_SIZE = 384  # bge-small-en-v1.5 dimension
+TRANSCRIPT_LANGUAGES = ['en', 'en-US', 'en-GB']
+CONTEXT_CHUNKS = 3  # top chunks passed to the LLM
+MAX_BATCH_QUESTIONS = 16  # per /ask-batch request
+MAX_CONTEXT_WORDS = 200  # per chunk
+STOPWORDS = {"what", "when", "where", "which", "who", "whom", "why", "how", "does", "did", "the",
+             "and", "that", "this", "with", "from", "about", "into", "video", "they", "their",
+             "there", "have", "has", "was", "were", "are", "for", "you", "your"}
+SEARCH_PARAMS = models.SearchParams(
+    hnsw_ef=64,
+    quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0)
+)
+ANSWER_CACHE = TTLCache(maxsize=1024, ttl=3600)  # (video_id, question) -> AnswerResponse
+# video_id -> version replaced each time its cached answers are cleared; values come from one
+# global counter, so an evicted entry never matches again and only skips caching
+ANSWER_CACHE_VERSIONS = TTLCache(maxsize=1024, ttl=3600)
+ANSWER_CACHE_VERSION_COUNTER = itertools.count(1)
+VIDEO_ID_PATTERN = re.compile(r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])')
 
 # Pydantic models
 class VideoRequest(BaseModel):
     video_url: str
+    force: bool = False
 
 class QuestionRequest(BaseModel):
     video_url: str
@@ -47,32 +104,219 @@ class AnswerResponse(BaseModel):
     answer: str
     relevant_chunks: List[str]
 
+# Embedding batcher
+class EmbedBatcher:
+    """Coalesce concurrent single-text embeddings into one embed() call"""
+
+    def __init__(self, model, max_batch_size: int = 32, timeout: float = 0.01):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    async def embed(self, text: str):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.timeout
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await asyncio.to_thread(lambda: list(self.model.embed(texts)))
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+batcher = EmbedBatcher(embedding_model, max_batch_size=32, timeout=0.01)
+
 # Helper functions
 def extract_video_id(url: str) -> str:
     """Extract YouTube video ID from URL"""
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([^&\n?#]+)',
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
+    match = VIDEO_ID_PATTERN.search(url)
+    if match:
+        return match.group(1)
     raise ValueError("Invalid YouTube URL")
 
-def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100) -> List[dict]:
-    """Split text into overlapping chunks"""
+def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100) -> Tuple[List[str], List[int]]:
+    """Split text into overlapping chunks, returning chunk texts and their starting word indices"""
     words = text.split()
-    chunks = []
+    texts = []
+    starts = []
     
     for i in range(0, len(words), chunk_size - overlap):
         chunk = ' '.join(words[i:i + chunk_size])
         if chunk:
-            chunks.append({
-                "text": chunk,
-                "start_idx": i
-            })
+            texts.append(chunk)
+            starts.append(i)
+    
+    return texts, starts
+
+def video_id_filter(video_id: str) -> Filter:
+    """Build a filter matching all points of a video"""
+    return Filter(
+        must=[
+            FieldCondition(
+                key="video_id",
+                match=MatchValue(value=video_id)
+            )
+        ]
+    )
+
+def question_tokens(question: str) -> set:
+    """Significant lowercase words of a question"""
+    return {word for word in re.findall(r"\w+", question.lower()) if len(word) > 2 and word not in STOPWORDS}
+
+def trim_chunk(text: str, tokens: set, max_words: int = MAX_CONTEXT_WORDS) -> str:
+    """Keep the sentences of a chunk that share words with the question, capped at max_words"""
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    if len(sentences) == 1:
+        # Auto-generated captions have no punctuation; keep a window around the first match instead
+        words = text.split()
+        hit = next(
+            (idx for idx, word in enumerate(words) if tokens & set(re.findall(r"\w+", word.lower()))),
+            0
+        )
+        start = max(0, min(hit - max_words // 2, len(words) - max_words))
+        return " ".join(words[start:start + max_words])
+    relevant = [s for s in sentences if tokens & set(re.findall(r"\w+", s.lower()))]
+    words = " ".join(relevant or sentences).split()
+    return " ".join(words[:max_words])
+
+def chunk_point_id(video_id: str, chunk_index: int) -> str:
+    """Deterministic point ID so reprocessing overwrites chunks in place"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{video_id}:{chunk_index}"))
+
+def clear_answer_cache(video_id: str):
+    """Drop cached answers for a video"""
+    ANSWER_CACHE_VERSIONS[video_id] = next(ANSWER_CACHE_VERSION_COUNTER)
+    for key in [key for key in ANSWER_CACHE.keys() if key[0] == video_id]:
+        ANSWER_CACHE.pop(key, None)
+
+def answer_cache_version(video_id: str) -> int:
+    """Current answer cache version of a video, assigned on first use"""
+    version = ANSWER_CACHE_VERSIONS.get(video_id)
+    if version is None:
+        version = ANSWER_CACHE_VERSIONS[video_id] = next(ANSWER_CACHE_VERSION_COUNTER)
+    return version
+
+def cache_answer(cache_key: tuple, answer: AnswerResponse, version: int):
+    """Cache an answer unless the video's answers were cleared since it was started"""
+    if ANSWER_CACHE_VERSIONS.get(cache_key[0]) == version:
+        ANSWER_CACHE[cache_key] = answer
+
+def fetch_transcript(video_id: str) -> str:
+    """Fetch the English transcript text of a video"""
+    try:
+        # Fetch transcript with language priority
+        fetched_transcript = ytt_api.fetch(video_id, languages=TRANSCRIPT_LANGUAGES)
+    except Exception as e:
+        # Try alternative method if fetch fails
+        try:
+            transcript_list = ytt_api.list(video_id)
+            fetched_transcript = transcript_list.find_transcript(TRANSCRIPT_LANGUAGES).fetch()
+        except Exception as e2:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Failed to fetch transcript: {str(e)}. Alternative method also failed: {str(e2)}"
+            )
     
-    return chunks
+    # Convert to raw data and extract text
+    return " ".join([item['text'] for item in fetched_transcript.to_raw_data()])
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Embed texts into a unit-normalized float32 matrix"""
+    embeddings = np.empty((len(texts), VECTOR_SIZE), dtype=np.float32)
+    for idx, embedding in enumerate(embedding_model.embed(texts)):
+        embeddings[idx] = embedding
+    # Unit-length vectors make dot product equal to cosine similarity
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+    return embeddings
+
+def create_completion(question: str, relevant_chunks: List[str], stream: bool = False):
+    """Ask the Groq LLM to answer a question from trimmed transcript chunks"""
+    tokens = question_tokens(question)
+    context = "\n\n".join(trim_chunk(chunk, tokens) for chunk in relevant_chunks)
+    
+    prompt = f"""You are a helpful assistant that answers questions about video content.
+
+Context from the video transcript:
+{context}
+
+Question: {question}
+
+Please provide a clear, concise answer based on the context provided. If the context doesn't contain enough information to answer the question, say so."""
+
+    return groq_client.chat.completions.create(
+        messages=[
+            {
+                "role": "system",
+                "content": "You are a helpful assistant that answers questions about video content based on provided transcripts."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        model="llama-3.3-70b-versatile",
+        temperature=0.3,
+        max_tokens=512,
+        stream=stream,
+    )
+
+async def stream_answer(relevant_chunks: List[str], pieces: Iterable[str],
+                        cache_key: Optional[tuple] = None, cache_version: int = 0):
+    """Yield a JSON header line with the sources, then the answer text as it arrives"""
+    yield json.dumps({"relevant_chunks": relevant_chunks}) + "\n"
+    # Blocking reads go to a worker thread; cache writes stay on the event loop
+    iterator = iter(pieces)
+    done = object()
+    answer_parts = []
+    while True:
+        piece = await asyncio.to_thread(next, iterator, done)
+        if piece is done:
+            break
+        if piece:
+            answer_parts.append(piece)
+            yield piece
+    if cache_key is not None:
+        cache_answer(
+            cache_key,
+            AnswerResponse(answer="".join(answer_parts), relevant_chunks=relevant_chunks),
+            cache_version
+        )
 
 def create_collection_if_not_exists():
     """Create Qdrant collection if it doesn't exist"""
@@ -81,14 +325,34 @@ def create_collection_if_not_exists():
     except:
         qdrant_client.create_collection(
             collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.DOT, on_disk=True),
+            quantization_config=models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    always_ram=True
+                )
+            ),
+            hnsw_config=models.HnswConfigDiff(m=32, ef_construct=256, full_scan_threshold=10000)
+        )
+        qdrant_client.create_payload_index(
+            collection_name=COLLECTION_NAME,
+            field_name="video_id",
+            field_schema=models.PayloadSchemaType.KEYWORD
         )
 
 # API Endpoints
 @app.on_event("startup")
 async def startup_event():
-    """Initialize collection on startup"""
+    """Initialize collection and warm up the embedding model on startup"""
     create_collection_if_not_exists()
+    qdrant_client.get_collections()
+    list(embedding_model.embed(["warmup"]))
+    batcher.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the embedding batcher"""
+    await batcher.stop()
 
 @app.get("/")
 async def root():
@@ -107,85 +371,110 @@ async def process_video(request: VideoRequest):
         # Extract video ID
         video_id = extract_video_id(request.video_url)
         
-        # Get transcript using the correct API
-        try:
-            # Initialize the API instance
-            ytt_api = YouTubeTranscriptApi()
-            
-            # Fetch transcript with language priority
-            fetched_transcript = ytt_api.fetch(video_id, languages=['en', 'en-US', 'en-GB'])
-            
-            # Convert to raw data and extract text
-            transcript_data = fetched_transcript.to_raw_data()
-            transcript_text = " ".join([item['text'] for item in transcript_data])
-            
-        except Exception as e:
-            # Try alternative method if fetch fails
-            try:
-                transcript_list = ytt_api.list(video_id)
-                transcript = transcript_list.find_transcript(['en', 'en-US', 'en-GB'])
-                transcript_data = transcript.fetch()
-                transcript_text = " ".join([item['text'] for item in transcript_data])
-            except Exception as e2:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Failed to fetch transcript: {str(e)}. Alternative method also failed: {str(e2)}"
-                )
+        # Skip reprocessing if this video is already stored
+        if not request.force:
+            existing = await asyncio.to_thread(
+                qdrant_client.count,
+                collection_name=COLLECTION_NAME,
+                count_filter=video_id_filter(video_id),
+                exact=False
+            )
+            if existing.count > 0:
+                return {
+                    "message": "Video already processed",
+                    "video_id": video_id,
+                    "chunks_created": existing.count,
+                    "cached": True
+                }
+        
+        # Get transcript off the event loop
+        transcript_text = await asyncio.to_thread(fetch_transcript, video_id)
         
         if not transcript_text.strip():
             raise HTTPException(status_code=400, detail="Transcript is empty")
         
         # Chunk the transcript
-        chunks = chunk_text(transcript_text)
+        chunk_texts, chunk_starts = await asyncio.to_thread(chunk_text, transcript_text)
         
-        if not chunks:
+        if not chunk_texts:
             raise HTTPException(status_code=400, detail="Failed to create chunks from transcript")
         
-        # Generate embeddings
-        chunk_texts = [chunk["text"] for chunk in chunks]
-        embeddings = list(embedding_model.embed(chunk_texts))
+        # Only a forced reprocess can reach here with points already stored
+        stored = []
+        if request.force:
+            stored = await asyncio.to_thread(
+                qdrant_client.retrieve,
+                collection_name=COLLECTION_NAME,
+                ids=[chunk_point_id(video_id, 0)],
+                with_payload=["chunk_count"]
+            )
+        
+        clear_answer_cache(video_id)
+        
+        # Generate embeddings in a worker thread while the rest of the upload is prepared
+        embedding_task = asyncio.create_task(asyncio.to_thread(embed_texts, chunk_texts))
         
-        # Delete existing points for this video
         try:
-            from qdrant_client.models import Filter, FieldCondition, MatchValue
-            qdrant_client.delete(
-                collection_name=COLLECTION_NAME,
-                points_selector=Filter(
-                    must=[
+            # Points are overwritten by ID; only drop chunks past the new transcript's end
+            if not stored:
+                # Points stored before IDs were deterministic are never overwritten
+                if request.force:
+                    await asyncio.to_thread(
+                        qdrant_client.delete,
+                        collection_name=COLLECTION_NAME,
+                        points_selector=video_id_filter(video_id)
+                    )
+            else:
+                previous_count = stored[0].payload.get("chunk_count")
+                if previous_count is None or previous_count > len(chunk_texts):
+                    stale_filter = video_id_filter(video_id)
+                    stale_filter.must.append(
                         FieldCondition(
-                            key="video_id",
-                            match=MatchValue(value=video_id)
+                            key="chunk_index",
+                            range=models.Range(gte=len(chunk_texts))
                         )
-                    ]
-                )
-            )
-        except:
-            pass  # Collection might be empty
-        
-        # Store in Qdrant
-        points = []
-        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            point = PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding.tolist(),
-                payload={
+                    )
+                    await asyncio.to_thread(
+                        qdrant_client.delete,
+                        collection_name=COLLECTION_NAME,
+                        points_selector=stale_filter
+                    )
+            
+            payloads = [
+                {
                     "video_id": video_id,
-                    "text": chunk["text"],
+                    "text": text,
                     "chunk_index": idx,
+                    "start_idx": chunk_starts[idx],
                     "video_url": request.video_url
                 }
-            )
-            points.append(point)
+                for idx, text in enumerate(chunk_texts)
+            ]
+            payloads[0]["chunk_count"] = len(chunk_texts)
+            
+            embeddings = await embedding_task
+        finally:
+            # Don't leave the embedding task unobserved if anything above failed
+            if not embedding_task.done():
+                embedding_task.cancel()
+            elif not embedding_task.cancelled():
+                embedding_task.exception()
         
-        qdrant_client.upsert(
+        # Store in Qdrant
+        await asyncio.to_thread(
+            qdrant_client.upload_collection,
             collection_name=COLLECTION_NAME,
-            points=points
+            vectors=embeddings,
+            payload=payloads,
+            ids=[chunk_point_id(video_id, idx) for idx in range(len(chunk_texts))],
+            batch_size=256,
+            wait=True
         )
         
         return {
             "message": "Video processed successfully",
             "video_id": video_id,
-            "chunks_created": len(chunks),
+            "chunks_created": len(chunk_texts),
             "transcript_length": len(transcript_text)
         }
         
@@ -196,37 +485,43 @@ async def process_video(request: VideoRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
-@app.post("/ask", response_model=AnswerResponse)
+@app.post("/ask", response_class=StreamingResponse)
 async def ask_question(request: QuestionRequest):
     """
     Answer a question about the video:
     1. Generate question embedding
     2. Retrieve relevant chunks from Qdrant
     3. Use Groq LLM to generate answer
+    
+    The response streams a JSON line with the relevant chunks, followed by the answer text.
     """
     try:
         # Extract video ID
         video_id = extract_video_id(request.video_url)
         
+        # Return cached answer for a repeated question
+        cache_key = (video_id, request.question.strip().lower())
+        cache_version = answer_cache_version(video_id)
+        cached_answer = ANSWER_CACHE.get(cache_key)
+        if cached_answer is not None:
+            return StreamingResponse(
+                stream_answer(cached_answer.relevant_chunks, [cached_answer.answer]),
+                media_type="text/plain"
+            )
+        
         # Generate question embedding
-        question_embedding = list(embedding_model.embed([request.question]))[0]
+        question_embedding = await batcher.embed(request.question)
+        question_embedding = question_embedding / (np.linalg.norm(question_embedding) + 1e-12)
         
         # Search in Qdrant with proper filter
-        from qdrant_client.models import Filter, FieldCondition, MatchValue
-        
-        search_results = qdrant_client.query_points(
+        search_results = (await asyncio.to_thread(
+            qdrant_client.query_points,
             collection_name=COLLECTION_NAME,
             query=question_embedding.tolist(),
-            query_filter=Filter(
-                must=[
-                    FieldCondition(
-                        key="video_id",
-                        match=MatchValue(value=video_id)
-                    )
-                ]
-            ),
-            limit=5
-        ).points
+            query_filter=video_id_filter(video_id),
+            search_params=SEARCH_PARAMS,
+            limit=CONTEXT_CHUNKS
+        )).points
         
         if not search_results:
             raise HTTPException(
@@ -236,39 +531,20 @@ async def ask_question(request: QuestionRequest):
         
         # Extract relevant chunks
         relevant_chunks = [result.payload["text"] for result in search_results]
-        context = "\n\n".join(relevant_chunks)
         
         # Generate answer using Groq
-        prompt = f"""You are a helpful assistant that answers questions about video content.
-
-Context from the video transcript:
-{context}
-
-Question: {request.question}
-
-Please provide a clear, concise answer based on the context provided. If the context doesn't contain enough information to answer the question, say so."""
-
-        chat_completion = groq_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that answers questions about video content based on provided transcripts."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            max_tokens=1024,
+        completion_stream = await asyncio.to_thread(
+            create_completion, request.question, relevant_chunks, stream=True
         )
         
-        answer = chat_completion.choices[0].message.content
-        
-        return AnswerResponse(
-            answer=answer,
-            relevant_chunks=relevant_chunks
+        return StreamingResponse(
+            stream_answer(
+                relevant_chunks,
+                (chunk.choices[0].delta.content for chunk in completion_stream if chunk.choices),
+                cache_key,
+                cache_version
+            ),
+            media_type="text/plain"
         )
         
     except ValueError as e:
@@ -278,22 +554,93 @@ Please provide a clear, concise answer based on the context provided. If the con
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
+@app.post("/ask-batch", response_model=List[AnswerResponse])
+async def ask_questions(requests: Annotated[List[QuestionRequest], Field(max_length=MAX_BATCH_QUESTIONS)]):
+    """
+    Answer several questions in one call:
+    1. Embed all uncached questions together
+    2. Retrieve relevant chunks with a single batched Qdrant query
+    3. Generate the answers with Groq concurrently
+    """
+    try:
+        video_ids = [extract_video_id(request.video_url) for request in requests]
+        cache_keys = [
+            (video_id, request.question.strip().lower())
+            for video_id, request in zip(video_ids, requests)
+        ]
+        cache_versions = [answer_cache_version(video_id) for video_id in video_ids]
+        answers = [ANSWER_CACHE.get(cache_key) for cache_key in cache_keys]
+        
+        # Each distinct uncached question is answered once
+        pending = []
+        pending_keys = set()
+        for idx, answer in enumerate(answers):
+            if answer is None and cache_keys[idx] not in pending_keys:
+                pending_keys.add(cache_keys[idx])
+                pending.append(idx)
+        
+        if pending:
+            question_embeddings = await asyncio.to_thread(
+                embed_texts, [requests[idx].question for idx in pending]
+            )
+            
+            search_responses = await asyncio.to_thread(
+                qdrant_client.query_batch_points,
+                collection_name=COLLECTION_NAME,
+                requests=[
+                    models.QueryRequest(
+                        query=embedding.tolist(),
+                        filter=video_id_filter(video_ids[idx]),
+                        params=SEARCH_PARAMS,
+                        limit=CONTEXT_CHUNKS,
+                        with_payload=True
+                    )
+                    for idx, embedding in zip(pending, question_embeddings)
+                ]
+            )
+            
+            relevant_chunks = []
+            for idx, response in zip(pending, search_responses):
+                if not response.points:
+                    raise HTTPException(
+                        status_code=404, 
+                        detail=f"No content found for video {video_ids[idx]}. Please process the video first."
+                    )
+                relevant_chunks.append([point.payload["text"] for point in response.points])
+            
+            completions = await asyncio.gather(*[
+                asyncio.to_thread(create_completion, requests[idx].question, chunks)
+                for idx, chunks in zip(pending, relevant_chunks)
+            ])
+            
+            new_answers = {}
+            for idx, chunks, completion in zip(pending, relevant_chunks, completions):
+                new_answers[cache_keys[idx]] = AnswerResponse(
+                    answer=completion.choices[0].message.content,
+                    relevant_chunks=chunks
+                )
+                cache_answer(cache_keys[idx], new_answers[cache_keys[idx]], cache_versions[idx])
+            
+            answers = [answer or new_answers[cache_key] for answer, cache_key in zip(answers, cache_keys)]
+        
+        return answers
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+
 @app.delete("/video/{video_id}")
 async def delete_video(video_id: str):
     """Delete all data for a specific video"""
     try:
-        from qdrant_client.models import Filter, FieldCondition, MatchValue
         qdrant_client.delete(
             collection_name=COLLECTION_NAME,
-            points_selector=Filter(
-                must=[
-                    FieldCondition(
-                        key="video_id",
-                        match=MatchValue(value=video_id)
-                    )
-                ]
-            )
+            points_selector=video_id_filter(video_id)
         )
+        clear_answer_cache(video_id)
         return {"message": f"Video {video_id} deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete video: {str(e)}")
@@ -108,21 +108,51 @@ function App() {
         })
       });
 
-      const data = await response.json();
-
       if (response.ok) {
-        setAnswer(data.answer);
-        setConversationHistory(prev => {
-          const newHistory = [...prev];
-          newHistory[newHistory.length - 1] = {
-            question: currentQuestion,
-            answer: data.answer,
-            sources: data.relevant_chunks,
-            loading: false
-          };
-          return newHistory;
-        });
+        // First line is a JSON header with the sources, the rest is the streamed answer
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let sources = null;
+        let streamedAnswer = '';
+
+        const updateEntry = () => {
+          setConversationHistory(prev => {
+            const newHistory = [...prev];
+            newHistory[newHistory.length - 1] = {
+              question: currentQuestion,
+              answer: streamedAnswer,
+              sources: sources,
+              loading: false
+            };
+            return newHistory;
+          });
+        };
+
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          if (sources === null) {
+            const newlineIndex = buffer.indexOf('\n');
+            if (newlineIndex === -1) continue;
+            sources = JSON.parse(buffer.slice(0, newlineIndex)).relevant_chunks;
+            buffer = buffer.slice(newlineIndex + 1);
+          }
+
+          if (buffer) {
+            streamedAnswer += buffer;
+            buffer = '';
+            updateEntry();
+          }
+        }
+
+        streamedAnswer += decoder.decode();
+        setAnswer(streamedAnswer);
+        updateEntry();
       } else {
+        const data = await response.json();
         setError(data.detail || 'Failed to get answer');
         setConversationHistory(prev => prev.slice(0, -1));
         setTimeout(() => setError(''), 5000);